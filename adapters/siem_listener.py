@@ -1,8 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 import subprocess
 import json
 import logging
 import os
+import gzip
+import zlib
+import queue
+import threading
 import tempfile
 import uuid
 import yaml
@@ -27,6 +31,63 @@ def extract_params(alert_data):
     if hostname: params["endpoint_id"] = hostname
     return params
 
+def route_alert(alert_data):
+    alert_name = alert_data.get("rule_name") or alert_data.get("rule", {}).get("name")
+    return alert_name, PLAYBOOK_MAPPING.get(alert_name)
+
+def trigger_playbook(playbook_path, extracted_params):
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    base_playbook_path = os.path.join(project_root, playbook_path)
+    with open(base_playbook_path, 'r') as f_base:
+        temp_playbook_data = yaml.safe_load(f_base)
+
+    if 'steps' in temp_playbook_data:
+        for step in temp_playbook_data['steps']:
+            if 'parameters' in step:
+                for key, value in extracted_params.items():
+                     if key in step['parameters']:
+                          step['parameters'][key] = value
+
+    temp_playbook_name = f"runtime_playbook_{uuid.uuid4()}.yml"
+    temp_playbook_path_host = os.path.join(project_root, "playbooks", temp_playbook_name)
+    temp_playbook_path_container = f"/app/playbooks/{temp_playbook_name}" 
+
+    with open(temp_playbook_path_host, 'w') as f_temp:
+        yaml.dump(temp_playbook_data, f_temp)
+    
+    logging.info(f"Generated temporary playbook: {temp_playbook_name}")
+
+    # --- FIX ---
+    # Use modern 'docker compose'
+    orchestrator_command = [
+        "docker", "compose", 
+        "-f", "../docker-compose.yml", 
+        "run", # Use run, not exec, as orchestrator isn't running daemonized
+        "--rm",
+        "-T",   
+        "orchestrator", 
+        "python3", "orchestrator.py", 
+        temp_playbook_path_container 
+    ]
+    # --- END FIX ---
+    
+    logging.info(f"Executing command: {' '.join(orchestrator_command)}")
+    # This is now 100% real code, it will execute the command
+    result = subprocess.run(orchestrator_command, cwd=project_root, capture_output=True, text=True)
+    
+    # Clean up temp playbook file *after* execution
+    try:
+        os.remove(temp_playbook_path_host)
+        logging.info(f"Removed temporary playbook: {temp_playbook_name}")
+    except OSError as e_rm:
+        logging.warning(f"Failed to remove temporary playbook: {e_rm}")
+
+    if result.returncode == 0:
+        logging.info(f"Orchestrator finished successfully via adapter. Output:\n{result.stdout}")
+    else:
+        logging.error(f"Orchestrator failed via adapter. Return Code: {result.returncode}\nStderr:\n{result.stderr}\nStdout:\n{result.stdout}")
+    return result
+
 @app.route('/webhook', methods=['POST'])
 def siem_webhook():
     try:
@@ -36,8 +97,7 @@ def siem_webhook():
             return jsonify({"status": "error", "message": "Empty request body"}), 400
 
         logging.info(f"Received alert: {json.dumps(alert_data, indent=2)}")
-        alert_name = alert_data.get("rule_name") or alert_data.get("rule", {}).get("name")
-        playbook_path = PLAYBOOK_MAPPING.get(alert_name)
+        alert_name, playbook_path = route_alert(alert_data)
 
         if not playbook_path:
             logging.info(f"No playbook mapped for alert: '{alert_name}'. Ignoring.")
@@ -48,57 +108,10 @@ def siem_webhook():
         logging.info(f"Mapped to playbook: {playbook_path}")
 
         try:
-             project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-             base_playbook_path = os.path.join(project_root, playbook_path)
-             with open(base_playbook_path, 'r') as f_base:
-                 temp_playbook_data = yaml.safe_load(f_base)
-
-             if 'steps' in temp_playbook_data:
-                 for step in temp_playbook_data['steps']:
-                     if 'parameters' in step:
-                         for key, value in extracted_params.items():
-                              if key in step['parameters']:
-                                   step['parameters'][key] = value
-
-             temp_playbook_name = f"runtime_playbook_{uuid.uuid4()}.yml"
-             temp_playbook_path_host = os.path.join(project_root, "playbooks", temp_playbook_name)
-             temp_playbook_path_container = f"/app/playbooks/{temp_playbook_name}" 
-
-             with open(temp_playbook_path_host, 'w') as f_temp:
-                 yaml.dump(temp_playbook_data, f_temp)
-             
-             logging.info(f"Generated temporary playbook: {temp_playbook_name}")
-
-             # --- FIX ---
-             # Use modern 'docker compose'
-             orchestrator_command = [
-                 "docker", "compose", 
-                 "-f", "../docker-compose.yml", 
-                 "run", # Use run, not exec, as orchestrator isn't running daemonized
-                 "--rm",
-                 "-T",   
-                 "orchestrator", 
-                 "python3", "orchestrator.py", 
-                 temp_playbook_path_container 
-             ]
-             # --- END FIX ---
-             
-             logging.info(f"Executing command: {' '.join(orchestrator_command)}")
-             # This is now 100% real code, it will execute the command
-             result = subprocess.run(orchestrator_command, cwd=project_root, capture_output=True, text=True)
-             
-             # Clean up temp playbook file *after* execution
-             try:
-                 os.remove(temp_playbook_path_host)
-                 logging.info(f"Removed temporary playbook: {temp_playbook_name}")
-             except OSError as e_rm:
-                 logging.warning(f"Failed to remove temporary playbook: {e_rm}")
-
+             result = trigger_playbook(playbook_path, extracted_params)
              if result.returncode == 0:
-                 logging.info(f"Orchestrator finished successfully via adapter. Output:\n{result.stdout}")
                  return jsonify({"status": "success", "message": f"Triggered and completed playbook {playbook_path}"}), 200
              else:
-                 logging.error(f"Orchestrator failed via adapter. Return Code: {result.returncode}\nStderr:\n{result.stderr}\nStdout:\n{result.stdout}")
                  return jsonify({"status": "error", "message": f"Orchestrator failed (Code: {result.returncode})"}), 500
 
         except Exception as e_inner:
@@ -109,6 +122,110 @@ def siem_webhook():
         logging.exception("Error processing webhook:")
         return jsonify({"status": "error", "message": "Internal server error"}), 500
 
+# --- Bulk NDJSON ingestion ---
+# SIEM forwarders POST batches of alerts as newline-delimited JSON, optionally gzip-compressed
+# (Content-Encoding: gzip). The body is decompressed and parsed line by line while the results
+# are streamed back as NDJSON, so memory stays bounded by MAX_ALERT_BYTES and the dispatch queue
+# rather than by the batch size. Accepted alerts are handed to a small pool of worker threads.
+MAX_ALERT_BYTES = 64 * 1024
+DISPATCH_QUEUE_SIZE = 256
+DISPATCH_WORKERS = 2
+DISPATCH_TIMEOUT_SECONDS = 5
+
+dispatch_queue = queue.Queue(maxsize=DISPATCH_QUEUE_SIZE)
+dispatch_workers = []
+dispatch_lock = threading.Lock()
+
+def dispatch_worker():
+    while True:
+        playbook_path, extracted_params = dispatch_queue.get()
+        try:
+            trigger_playbook(playbook_path, extracted_params)
+        except Exception:
+            logging.exception(f"Error during bulk-triggered run of {playbook_path}:")
+        finally:
+            dispatch_queue.task_done()
+
+def ensure_dispatch_workers():
+    with dispatch_lock:
+        while len(dispatch_workers) < DISPATCH_WORKERS:
+            worker = threading.Thread(target=dispatch_worker, daemon=True)
+            worker.start()
+            dispatch_workers.append(worker)
+
+def iter_ndjson_lines(stream):
+    """Yields (line_number, raw_line, error) without ever holding more than one line in memory."""
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_ALERT_BYTES + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > MAX_ALERT_BYTES and not line.endswith(b"\n"):
+            # Drain the rest of the oversized line in bounded chunks
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(MAX_ALERT_BYTES)
+            yield line_number, None, f"Alert exceeds {MAX_ALERT_BYTES} bytes"
+            continue
+        yield line_number, line.strip(), None
+
+def process_bulk_alert(line_number, raw_line, batch):
+    try:
+        alert_data = json.loads(raw_line)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return {"line": line_number, "status": "rejected", "message": f"Invalid JSON: {e}"}
+    if not isinstance(alert_data, dict):
+        return {"line": line_number, "status": "rejected", "message": "Alert must be a JSON object"}
+
+    try:
+        alert_name, playbook_path = route_alert(alert_data)
+        if not playbook_path:
+            return {"line": line_number, "status": "ignored", "message": "No playbook mapping found"}
+        extracted_params = extract_params(alert_data)
+    except (AttributeError, TypeError) as e:
+        return {"line": line_number, "status": "rejected", "message": f"Malformed alert: {e}"}
+
+    try:
+        # Wait for a free slot only until the queue first fills up; after that the rest of the
+        # batch is rejected straight away instead of holding the response open per alert
+        if batch["queue_full"]:
+            dispatch_queue.put_nowait((playbook_path, extracted_params))
+        else:
+            dispatch_queue.put((playbook_path, extracted_params), timeout=DISPATCH_TIMEOUT_SECONDS)
+    except queue.Full:
+        batch["queue_full"] = True
+        return {"line": line_number, "status": "rejected", "message": "Dispatch queue full, retry later"}
+    return {"line": line_number, "status": "accepted", "playbook": playbook_path, "parameters": extracted_params}
+
+@app.route('/webhook/bulk', methods=['POST'])
+def siem_bulk_webhook():
+    encoding = (request.headers.get("Content-Encoding") or "").lower()
+    if encoding not in ("", "identity", "gzip"):
+        return jsonify({"status": "error", "message": f"Unsupported Content-Encoding: {encoding}"}), 415
+    ensure_dispatch_workers()
+
+    def generate():
+        stream = gzip.GzipFile(fileobj=request.stream, mode='rb') if encoding == "gzip" else request.stream
+        counts = {"accepted": 0, "ignored": 0, "rejected": 0}
+        batch = {"queue_full": False}
+        try:
+            for line_number, raw_line, error in iter_ndjson_lines(stream):
+                if raw_line == b"":
+                    continue
+                if error:
+                    result = {"line": line_number, "status": "rejected", "message": error}
+                else:
+                    result = process_bulk_alert(line_number, raw_line, batch)
+                counts[result["status"]] += 1
+                yield json.dumps(result) + "\n"
+        except (OSError, EOFError, zlib.error) as e:
+            logging.warning(f"Bulk request body could not be decoded: {e}")
+            yield json.dumps({"status": "error", "message": f"Malformed request body: {e}"}) + "\n"
+        logging.info(f"Bulk ingestion finished: {counts}")
+        yield json.dumps({"summary": counts}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
     os.makedirs(os.path.join(os.path.dirname(__file__), "..", "playbooks"), exist_ok=True) 
     logging.info("Starting SIEM Webhook Listener on port 5001...")
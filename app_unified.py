@@ -1,12 +1,17 @@
 from flask import Flask, render_template, jsonify, request, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 import subprocess
 import os
 import threading
 import pty 
 import logging
-import yaml
 import json
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'orchestrator'))
+from policy_store import PolicyStore, DEFAULT_POLICY_PATH
+from playbook_validator import validate_playbook, validate_many, load_plugin_catalog, has_errors
+from audit_tail import AuditLogTailer
 
 def setup_logging():
     log_formatter = logging.Formatter('%(asctime)s [%(levelname)-5.5s]  %(message)s')
@@ -96,46 +101,32 @@ def run_playbook_endpoint():
     pipeline_thread.start()
     return jsonify({"status": "success", "message": "Playbook run started."}), 202
 
-SAFETY_POLICIES = {
-    "critical_asset_check": {"type": "do_not_isolate", "targets": ["endpoint-db-01", "endpoint-auth-svc"], "message": "Endpoint is a critical production asset."},
-    "corporate_ip_check": {"type": "do_not_block", "targets": ["8.8.8.8", "1.1.1.1", "208.67.222.222"], "message": "IP is a critical infrastructure service (e.g., public DNS)."}
-}
+# Same store (and snapshot) the orchestrator reads; parsed once, re-read only when the files change
+policy_store = PolicyStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), DEFAULT_POLICY_PATH))
+plugin_catalog = load_plugin_catalog()
 
 @app.route('/validate_playbook', methods=['POST'])
 def validate_playbook_endpoint():
     playbook_yaml = request.data.decode('utf-8')
-    results = []
-    playbook = None
-    try:
-        playbook = yaml.safe_load(playbook_yaml)
-        results.append({'type': 'success', 'title': 'YAML Syntax OK', 'message': 'Playbook parsed successfully.'})
-    except Exception as e:
-        results.append({'type': 'error', 'title': 'YAML Syntax Error', 'message': str(e)})
-        return jsonify(results)
-    if not playbook or not isinstance(playbook, dict) or 'steps' not in playbook:
-        results.append({'type': 'error', 'title': 'Invalid Playbook Structure', 'message': 'Must be a YAML object with a "steps" list.'})
-        return jsonify(results)
-    results.append({'type': 'info', 'title': 'Starting Policy Validation', 'message': f"Found {len(playbook['steps'])} steps."})
-    for index, step in enumerate(playbook['steps']):
-        step_name = step.get('name', f"Unnamed Step {index + 1}")
-        plugin = step.get('plugin', '')
-        params = step.get('parameters', {})
-        is_safe = True
-        if plugin and "isolate-endpoint" in plugin:
-            policy = SAFETY_POLICIES.get("critical_asset_check")
-            target = params.get("endpoint_id")
-            if policy and target and target in policy.get("targets", []):
-                results.append({'type': 'error', 'title': f'Step "{step_name}" VIOLATES policy!', 'message': f'[{policy.get("type")}] {policy.get("message")} Target: {target}'})
-                is_safe = False
-        if plugin and "block-ip" in plugin:
-            policy = SAFETY_POLICIES.get("corporate_ip_check")
-            target = params.get("ip_address")
-            if policy and target and target in policy.get("targets", []):
-                results.append({'type': 'error', 'title': f'Step "{step_name}" VIOLATES policy!', 'message': f'[{policy.get("type")}] {policy.get("message")} Target: {target}'})
-                is_safe = False
-        if is_safe:
-            results.append({'type': 'success', 'title': f'Step "{step_name}" PASSED', 'message': 'No safety policy violations found.'})
-    return jsonify(results)
+    return jsonify(validate_playbook(playbook_yaml, policy_store.snapshot(), plugin_catalog))
+
+@app.route('/validate_playbooks', methods=['POST'])
+def validate_playbooks_endpoint():
+    playbook_dir = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'playbooks'))
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict) or not isinstance(data.get('paths', []), list) or not all(isinstance(p, str) for p in data.get('paths', [])):
+        return jsonify({"status": "error", "message": 'Body must be a JSON object like {"paths": ["playbooks/..."]}.'}), 400
+    paths = []
+    for rel_path in data.get('paths') or ['playbooks']:
+        full_path = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), rel_path))
+        if os.path.commonpath([full_path, playbook_dir]) != playbook_dir:
+            return jsonify({"status": "error", "message": f"Path outside playbooks/: {rel_path}"}), 400
+        paths.append(full_path)
+    snapshot = policy_store.snapshot()
+    # jobs=1: never fork a process pool from inside this threaded server
+    report = validate_many(paths, snapshot, plugin_catalog, jobs=1)
+    playbooks = {os.path.relpath(path, os.path.dirname(playbook_dir)): {**entry, 'valid': not has_errors(entry['results'])} for path, entry in report.items()}
+    return jsonify({"policy_version": snapshot.version, "playbooks": playbooks})
 
 @app.route('/audit_log')
 def get_audit_log():
@@ -145,6 +136,18 @@ def get_audit_log():
     else:
         return "Audit log file not found.", 404
         
+audit_tailer = AuditLogTailer(socketio, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports', 'audit.log'))
+
+@socketio.on('audit_subscribe')
+def audit_subscribe(data):
+    data = data or {}
+    try:
+        offset = int(data.get('offset') or 0)
+    except (TypeError, ValueError):
+        offset = 0
+    audit_tailer.start()
+    audit_tailer.subscribe(emit, join_room, data.get('file_id'), offset)
+
 @app.route('/playbooks_list')
 def get_playbooks_list():
     playbook_dir = os.path.join(os.path.dirname(__file__), 'playbooks')
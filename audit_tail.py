@@ -0,0 +1,153 @@
+import os
+import hashlib
+import logging
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog is optional and not a declared dependency; polling is the default
+    Observer = None
+    FileSystemEventHandler = object
+
+# --- Incremental Audit Log Tailing ---
+# One background tailer follows reports/audit.log and broadcasts only newly appended,
+# complete lines to subscribed SocketIO clients. Clients track (file_id, offset) and send
+# them back on reconnect to resume where they left off. file_id changes when the log is
+# rotated or recreated (run_ci.sh does `rm -f reports/audit.log`), in which case the
+# client is told to reset and replays the new file from offset 0.
+
+AUDIT_ROOM = 'audit_log'
+READ_CHUNK_BYTES = 256 * 1024
+FALLBACK_POLL_SECONDS = 1.0
+WATCHDOG_SAFETY_SECONDS = 10.0
+# The millisecond timestamp opening each record is only 23 bytes; this works because a whole
+# audit record (timestamp, level and message) is always longer than 32 bytes, so the head is
+# complete once the first record is. A log whose first record were shorter would not be
+# tailed until more was appended.
+FILE_ID_HEAD_BYTES = 32
+
+def file_identity(path):
+    """Returns (file_id, size), or (None, 0) if the file is missing or too new to identify.
+
+    The inode alone isn't enough, since a deleted log's inode can be reused by its replacement,
+    so the id also covers a fixed-size head of the file. Until that head exists the file is
+    treated as not there yet, so a file never changes id while it is being appended to.
+    """
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            head = f.read(FILE_ID_HEAD_BYTES)
+    except FileNotFoundError:
+        return None, 0
+    if len(head) < FILE_ID_HEAD_BYTES:
+        return None, 0
+    return f"{st.st_ino}-{hashlib.sha1(head).hexdigest()[:10]}", st.st_size
+
+def read_records(path, start, end=None):
+    """Yields (records, next_offset) chunks of complete lines between start and end."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        while end is None or offset < end:
+            limit = READ_CHUNK_BYTES if end is None else min(READ_CHUNK_BYTES, end - offset)
+            chunk = f.read(limit)
+            if not chunk:
+                return
+            complete = chunk.rfind(b"\n") + 1
+            if complete == 0:
+                if len(chunk) < READ_CHUNK_BYTES:
+                    return  # Partial last line; wait until it is finished
+                complete = len(chunk)  # Pathologically long line, ship it in pieces
+            elif complete < len(chunk):
+                f.seek(offset + complete)
+            offset += complete
+            yield chunk[:complete].decode('utf-8', errors='replace').splitlines(), offset
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, path, changed):
+        self.path = path
+        self.changed = changed
+
+    def on_any_event(self, event):
+        if self.path in (os.path.abspath(event.src_path), os.path.abspath(getattr(event, 'dest_path', '') or '')):
+            self.changed.set()
+
+class AuditLogTailer:
+    def __init__(self, socketio, path):
+        self.socketio = socketio
+        self.path = os.path.abspath(path)
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.file_id, self.position = None, 0
+        self.started = False
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+            self.file_id, size = file_identity(self.path)
+            self.position = self._last_complete_offset(size)
+        if Observer is not None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            observer = Observer()
+            observer.schedule(_ChangeHandler(self.path, self.changed), os.path.dirname(self.path), recursive=False)
+            observer.daemon = True
+            observer.start()
+        else:
+            logging.warning("watchdog is not installed; audit log tailing falls back to polling.")
+        self.socketio.start_background_task(self._run)
+
+    def _last_complete_offset(self, size):
+        if not size:
+            return 0
+        with open(self.path, 'rb') as f:
+            f.seek(max(0, size - READ_CHUNK_BYTES))
+            tail = f.read(size - f.tell())
+        return size - (len(tail) - tail.rfind(b"\n") - 1) if b"\n" in tail else max(0, size - len(tail))
+
+    def _run(self):
+        timeout = WATCHDOG_SAFETY_SECONDS if Observer is not None else FALLBACK_POLL_SECONDS
+        while True:
+            self.changed.wait(timeout=timeout)
+            self.changed.clear()
+            try:
+                self._drain()
+            except OSError as e:
+                logging.warning(f"Audit log tailing error: {e}")
+            except Exception:
+                # Keep tailing; a dead background task would silently stop the live view
+                logging.exception("Unexpected audit log tailing error:")
+
+    def _drain(self):
+        with self.lock:
+            self._drain_locked()
+
+    def _drain_locked(self):
+        file_id, size = file_identity(self.path)
+        if file_id != self.file_id or size < self.position:
+            # Rotated, truncated or deleted: everyone starts over on the new file
+            self.file_id, self.position = file_id, 0
+            self.socketio.emit('audit_reset', {'file_id': file_id}, to=AUDIT_ROOM)
+        if file_id is None or size == self.position:
+            return
+        for records, offset in read_records(self.path, self.position, size):
+            self.position = offset
+            self.socketio.emit('audit_records', {'file_id': file_id, 'offset': offset, 'records': records}, to=AUDIT_ROOM)
+
+    def subscribe(self, emit, join, file_id=None, offset=0):
+        """Replays what the client missed since (file_id, offset), then joins the live room.
+
+        Held under the tailer lock so no record is sent twice or skipped between catch-up and live.
+        """
+        with self.lock:
+            self._drain_locked()
+            if file_id != self.file_id or not 0 <= offset <= self.position:
+                offset = 0
+                emit('audit_reset', {'file_id': self.file_id})
+            if self.file_id is not None and offset < self.position:
+                for records, next_offset in read_records(self.path, offset, self.position):
+                    emit('audit_records', {'file_id': self.file_id, 'offset': next_offset, 'records': records})
+            emit('audit_synced', {'file_id': self.file_id, 'offset': self.position})
+            join(AUDIT_ROOM)
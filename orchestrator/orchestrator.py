@@ -5,6 +5,8 @@ import json
 import logging
 import random # Needed for conceptual Jira ticket ID
 from datetime import datetime
+from scheduler import HostScheduler
+from policy_store import PolicyStore, DEFAULT_POLICY_PATH
 
 # --- Logging Setup (same as before) ---
 def setup_logging():
@@ -23,12 +25,18 @@ def setup_logging():
 class Orchestrator:
     def __init__(self, playbook_path):
         try:
-            self.docker_client = docker.from_env()
+            self.scheduler = HostScheduler.from_env()
         except Exception as e:
              logging.error(f"Failed to connect to Docker: {e}. Is Docker running and accessible?")
              sys.exit(1)
+        try:
+            self.policy_store = PolicyStore(DEFAULT_POLICY_PATH)
+        except Exception as e:
+            logging.error(f"Failed to load safety policies from {DEFAULT_POLICY_PATH}: {e}")
+            sys.exit(1)
         self.playbook = self._load_playbook(playbook_path)
-        self.safety_policies = {p['name']: p for p in self.playbook.get('safety_policies', [])}
+        if self.playbook.get('safety_policies'):
+            logging.warning(f"Playbook-level 'safety_policies' are ignored; policies are read from {DEFAULT_POLICY_PATH}.")
         logging.info(f"Successfully loaded playbook: {self.playbook['name']}")
 
     def _load_playbook(self, path):
@@ -40,18 +48,15 @@ class Orchestrator:
             sys.exit(1)
 
     def _check_safety_policies(self, plugin_name, params):
-        if "block-ip" in plugin_name:
-            policy = self.safety_policies.get("corporate_ip_check")
-            if policy and params.get("ip_address") in policy.get("targets", []):
-                logging.warning(f"[SAFETY_CHECK_VIOLATION] Action BLOCKED. Attempted to block corporate IP: {params['ip_address']}")
-                return False
-        if "isolate-endpoint" in plugin_name:
-            policy = self.safety_policies.get("critical_asset_check")
-            if policy and params.get("endpoint_id") in policy.get("targets", []):
-                logging.warning(f"[SAFETY_CHECK_VIOLATION] Action BLOCKED. Attempted to isolate critical asset: {params['endpoint_id']}")
-                return False
-        logging.info("[SAFETY_CHECK_PASSED] Action is approved for execution.")
-        return True
+        # One snapshot per decision: a policy reload mid-check can't mix old and new rules
+        snapshot = self.policy_store.snapshot()
+        violations = snapshot.check(plugin_name, params)
+        for v in violations:
+            logging.warning(f"[SAFETY_CHECK_VIOLATION] Action BLOCKED by '{v.policy.name}' ({v.policy.type}): {v.policy.message} Target: {v.target} [policy_version={snapshot.version}]")
+        if violations:
+            return False, snapshot.version
+        logging.info(f"[SAFETY_CHECK_PASSED] Action is approved for execution. [policy_version={snapshot.version}]")
+        return True, snapshot.version
 
     def _execute_rollback(self, failed_step_name, failed_plugin, failed_params):
         logging.critical(f"[ROLLBACK_PROCEDURE] Attempting rollback for failed step: '{failed_step_name}'")
@@ -86,7 +91,7 @@ class Orchestrator:
            command = [f"{k}={v}" for k, v in rollback_params.items()]
            # NOTE: We assume rollback plugins exist but haven't built them. This call will fail if they don't exist.
            # To test this flow fully, you would need to build e.g., 'plugin-java-unblock-ip'
-           container = self.docker_client.containers.run(rollback_plugin, command, detach=False, remove=True, network_mode='host')
+           container = self.scheduler.run(rollback_plugin, command)
            output = container.decode('utf-8').strip()
            logging.info(f"[ROLLBACK_OUTPUT] {output}")
            logging.info(f"Rollback for step '{failed_step_name}' completed.")
@@ -111,33 +116,34 @@ class Orchestrator:
             
             logging.info(f"--- Starting Step {i+1}: {step_name} ---")
 
-            if not self._check_safety_policies(plugin_image, params):
-                executed_steps_history.append({'step': step, 'status': 'skipped_policy'})
+            approved, policy_version = self._check_safety_policies(plugin_image, params)
+            if not approved:
+                executed_steps_history.append({'step': step, 'status': 'skipped_policy', 'policy_version': policy_version})
                 continue 
 
             command = [f"{k}={v}" for k, v in params.items()]
 
             try:
                 logging.info(f"Executing plugin '{plugin_image}' with params: {command}")
-                # Use host network mode for plugins that might need to interact with local network/firewall
-                container = self.docker_client.containers.run(
-                    image=plugin_image, command=command, detach=False, remove=True, network_mode='host') 
+                # The scheduler picks a host from the pool and keeps host network mode for plugins
+                # that might need to interact with local network/firewall
+                container = self.scheduler.run(plugin_image, command)
                 output = container.decode('utf-8').strip()
                 # Attempt to parse as JSON, otherwise treat as raw string
                 try:
                     result = json.loads(output)
                     logging.info(f"[PLUGIN_OUTPUT] {result}")
-                    executed_steps_history.append({'step': step, 'status': 'success', 'output': result})
+                    executed_steps_history.append({'step': step, 'status': 'success', 'output': result, 'policy_version': policy_version})
                 except json.JSONDecodeError:
                     logging.info(f"[PLUGIN_RAW_OUTPUT] {output}") # Log raw if not JSON
-                    executed_steps_history.append({'step': step, 'status': 'success', 'output': output})
+                    executed_steps_history.append({'step': step, 'status': 'success', 'output': output, 'policy_version': policy_version})
 
                 logging.info(f"Step '{step_name}' completed successfully.")
 
             except docker.errors.ContainerError as e:
                 error_output = e.stderr.decode('utf-8').strip() if e.stderr else "No stderr."
                 logging.error(f"Step '{step_name}' FAILED with exit code {e.exit_status}. Error: {error_output}")
-                executed_steps_history.append({'step': step, 'status': 'failed', 'error': error_output})
+                executed_steps_history.append({'step': step, 'status': 'failed', 'error': error_output, 'policy_version': policy_version})
                 self._execute_rollback(step_name, plugin_image, params)
                 if step.get("on_failure") == "stop":
                     logging.error("Playbook execution halted due to 'on_failure: stop' policy.")
@@ -145,14 +151,14 @@ class Orchestrator:
             
             except docker.errors.ImageNotFound:
                  logging.error(f"Step '{step_name}' FAILED: Plugin image '{plugin_image}' not found. Ensure it is built.")
-                 executed_steps_history.append({'step': step, 'status': 'failed', 'error': f"Image not found: {plugin_image}"})
+                 executed_steps_history.append({'step': step, 'status': 'failed', 'error': f"Image not found: {plugin_image}", 'policy_version': policy_version})
                  # No rollback possible if plugin image doesn't exist
                  if step.get("on_failure") == "stop":
                      sys.exit(1)
 
             except Exception as e:
                 logging.exception(f"An unexpected error occurred while running plugin '{plugin_image}': {e}") # Use logging.exception for full traceback
-                executed_steps_history.append({'step': step, 'status': 'error', 'error': str(e)})
+                executed_steps_history.append({'step': step, 'status': 'error', 'error': str(e), 'policy_version': policy_version})
                 # Attempt rollback even on unexpected errors
                 self._execute_rollback(step_name, plugin_image, params)
                 if step.get("on_failure") == "stop":
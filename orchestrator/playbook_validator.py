@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import yaml
+import policy_store
+from policy_store import PolicyStore, DEFAULT_POLICY_PATH
+
+# --- Bulk Playbook Validation ---
+# Validates many playbooks at once (the whole playbooks/ directory, or a CI / pre-commit
+# changeset). Each file is checked for YAML syntax, playbook schema, plugin images known to
+# docker-compose.yml, plugin parameters and safety policies. Results are cached by content
+# hash + policy version + plugin catalog + validator source, so unchanged files are skipped
+# on the next run; cache misses are validated in parallel across processes.
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_COMPOSE_PATH = os.path.join(PROJECT_ROOT, "docker-compose.yml")
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, ".psor_cache", "validation.json")
+MAX_CACHE_ENTRIES = 5000
+# Part of every cache key, so changing the validation rules (this module, or
+# PolicySnapshot.check in policy_store.py) invalidates cached results
+_validator_hash = hashlib.sha256()
+for _source in (__file__, policy_store.__file__):
+    with open(_source, 'rb') as _f:
+        _validator_hash.update(_f.read())
+VALIDATOR_DIGEST = _validator_hash.hexdigest()[:12]
+# Below this many cache misses, process start-up costs more than it saves
+PARALLEL_THRESHOLD = 8
+
+VALID_ON_FAILURE = ("stop", "continue")
+KNOWN_STEP_KEYS = {"name", "plugin", "parameters", "on_failure"}
+
+# Parameters each plugin reads (see plugins/*/), as (required, optional)
+PLUGIN_PARAMETERS = {
+    "psor_platform_plugin-python-revoke-key": ({"key_id"}, set()),
+    "psor_platform_plugin-java-block-ip": ({"ip_address"}, {"port"}),
+    "psor_platform_plugin-java-unblock-ip": ({"ip_address"}, {"port"}),
+    "psor_platform_plugin-rust-isolate-endpoint": ({"endpoint_id"}, set()),
+    "psor_platform_plugin-rust-unisolate-endpoint": ({"endpoint_id"}, set()),
+    "psor_platform_plugin-js-log-message": ({"message"}, set()),
+}
+
+def load_plugin_catalog(compose_path=DEFAULT_COMPOSE_PATH):
+    """Returns the plugin image names built by docker-compose.yml."""
+    try:
+        with open(compose_path, 'r') as f:
+            compose = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        logging.warning(f"Could not read plugin catalog from {compose_path}: {e}")
+        return frozenset()
+    return frozenset(s["image"] for s in (compose.get("services") or {}).values() if isinstance(s, dict) and s.get("image"))
+
+def _check_step(index, step, snapshot, catalog):
+    if not isinstance(step, dict):
+        return [{'type': 'error', 'title': f'Step {index + 1} is invalid', 'message': 'Each step must be a YAML object.'}]
+    results = []
+    step_name = step.get('name', f"Unnamed Step {index + 1}")
+    plugin = step.get('plugin', '')
+    params = step.get('parameters', {})
+    ok = True
+
+    def fail(message):
+        nonlocal ok
+        ok = False
+        results.append({'type': 'error', 'title': f'Step "{step_name}" is invalid', 'message': message})
+
+    if not isinstance(step.get('name'), str):
+        fail('Missing or non-string "name".')
+    if not plugin or not isinstance(plugin, str):
+        fail('Missing or non-string "plugin".')
+        plugin = ''
+    elif catalog and plugin not in catalog:
+        fail(f'Plugin image "{plugin}" is not defined in docker-compose.yml.')
+    if not isinstance(params, dict):
+        fail('"parameters" must be a mapping.')
+        params = {}
+    if 'on_failure' in step and step['on_failure'] not in VALID_ON_FAILURE:
+        fail(f'"on_failure" must be one of {", ".join(VALID_ON_FAILURE)}.')
+    unknown_keys = set(step) - KNOWN_STEP_KEYS
+    if unknown_keys:
+        results.append({'type': 'warning', 'title': f'Step "{step_name}" has unknown keys', 'message': ', '.join(sorted(map(str, unknown_keys)))})
+
+    for key, value in params.items():
+        if isinstance(value, (dict, list)) or value is None:
+            fail(f'Parameter "{key}" must be a scalar value.')
+    if plugin in PLUGIN_PARAMETERS:
+        required, optional = PLUGIN_PARAMETERS[plugin]
+        missing = required - set(params)
+        if missing:
+            fail(f'Missing required parameter(s) for {plugin}: {", ".join(sorted(missing))}.')
+        unexpected = set(params) - required - optional
+        if unexpected:
+            results.append({'type': 'warning', 'title': f'Step "{step_name}" has unused parameters', 'message': f'{plugin} ignores: {", ".join(sorted(map(str, unexpected)))}.'})
+
+    for v in snapshot.check(plugin, params):
+        ok = False
+        results.append({'type': 'error', 'title': f'Step "{step_name}" VIOLATES policy!', 'message': f'[{v.policy.type}] {v.policy.message} Target: {v.target}', 'policy_version': snapshot.version})
+    if ok:
+        results.append({'type': 'success', 'title': f'Step "{step_name}" PASSED', 'message': 'No schema, parameter or safety policy problems found.', 'policy_version': snapshot.version})
+    return results
+
+def validate_playbook(playbook_yaml, snapshot, catalog=frozenset()):
+    """Validates one playbook document and returns the result list shown by the UI validator."""
+    results = []
+    try:
+        playbook = yaml.safe_load(playbook_yaml)
+        results.append({'type': 'success', 'title': 'YAML Syntax OK', 'message': 'Playbook parsed successfully.'})
+    except Exception as e:
+        results.append({'type': 'error', 'title': 'YAML Syntax Error', 'message': str(e)})
+        return results
+    if not playbook or not isinstance(playbook, dict) or not isinstance(playbook.get('steps'), list):
+        results.append({'type': 'error', 'title': 'Invalid Playbook Structure', 'message': 'Must be a YAML object with a "steps" list.'})
+        return results
+    if not isinstance(playbook.get('name'), str):
+        results.append({'type': 'error', 'title': 'Invalid Playbook Structure', 'message': 'Missing or non-string playbook "name".'})
+    if playbook.get('safety_policies'):
+        results.append({'type': 'warning', 'title': 'Playbook-level safety_policies ignored', 'message': 'Safety policies are read from the central policy store.'})
+    results.append({'type': 'info', 'title': 'Starting Policy Validation', 'message': f"Found {len(playbook['steps'])} steps. Using safety policy version {snapshot.version}.", 'policy_version': snapshot.version})
+    for index, step in enumerate(playbook['steps']):
+        results.extend(_check_step(index, step, snapshot, catalog))
+    return results
+
+def has_errors(results):
+    return any(r['type'] == 'error' for r in results)
+
+def _validate_entry(args):
+    path, text, snapshot, catalog = args
+    return path, validate_playbook(text, snapshot, catalog)
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache_path, cache):
+    cache_dir = os.path.dirname(cache_path) or '.'
+    os.makedirs(cache_dir, exist_ok=True)
+    # A unique temp file per writer, so concurrent requests in one process don't clobber each other
+    with tempfile.NamedTemporaryFile('w', dir=cache_dir, suffix='.tmp', delete=False) as f:
+        json.dump(cache, f)
+    try:
+        os.replace(f.name, cache_path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+def collect_playbooks(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(('.yml', '.yaml'))))
+        else:
+            files.append(path)
+    return files
+
+def validate_many(paths, snapshot, catalog=frozenset(), cache_path=DEFAULT_CACHE_PATH, jobs=None):
+    """Validates many playbook files; returns {path: {'cached': bool, 'results': [...]}}.
+
+    Pass cache_path=None to disable the on-disk cache.
+    """
+    catalog_digest = hashlib.sha256("\n".join(sorted(catalog)).encode()).hexdigest()[:12]
+    cache = _load_cache(cache_path) if cache_path else {}
+    report, keys, pending = {}, {}, []
+    for path in collect_playbooks(paths):
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except OSError as e:
+            report[path] = {'cached': False, 'results': [{'type': 'error', 'title': 'Unreadable Playbook', 'message': str(e)}]}
+            continue
+        key = f"{hashlib.sha256(raw).hexdigest()}:{snapshot.version}:{catalog_digest}:{VALIDATOR_DIGEST}"
+        keys[path] = key
+        if key in cache:
+            report[path] = {'cached': True, 'results': cache[key]}
+        else:
+            pending.append((path, raw.decode('utf-8', errors='replace'), snapshot, catalog))
+
+    if len(pending) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            validated = list(pool.map(_validate_entry, pending, chunksize=max(1, len(pending) // 32)))
+    else:
+        validated = [_validate_entry(entry) for entry in pending]
+    for path, results in validated:
+        report[path] = {'cached': False, 'results': results}
+        cache[keys[path]] = results
+
+    if cache_path and validated:
+        # Keep this run's entries and drop the oldest ones beyond the cap
+        used = set(keys.values())
+        stale = [k for k in cache if k not in used]
+        for k in stale[:max(0, len(cache) - MAX_CACHE_ENTRIES)]:
+            del cache[k]
+        try:
+            _save_cache(cache_path, cache)
+        except OSError as e:
+            logging.warning(f"Could not write validation cache {cache_path}: {e}")
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate PSOR playbooks against schema, plugin catalog and safety policies.")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(PROJECT_ROOT, "playbooks")], help="Playbook files or directories (default: playbooks/)")
+    parser.add_argument("--policies", default=os.path.join(PROJECT_ROOT, DEFAULT_POLICY_PATH), help="Policy store file or directory")
+    parser.add_argument("--compose", default=DEFAULT_COMPOSE_PATH, help="docker-compose.yml defining the plugin images")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Validation cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Re-validate every file")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    snapshot = PolicyStore(args.policies).snapshot()
+    catalog = load_plugin_catalog(args.compose)
+    report = validate_many(args.paths, snapshot, catalog, cache_path=None if args.no_cache else args.cache, jobs=args.jobs)
+    failed = [path for path, entry in report.items() if has_errors(entry['results'])]
+
+    if args.json:
+        print(json.dumps({'policy_version': snapshot.version, 'playbooks': report}, indent=2))
+    else:
+        for path, entry in report.items():
+            status = "FAIL" if path in failed else "ok"
+            print(f"[{status}] {path}{' (cached)' if entry['cached'] else ''}")
+            for r in entry['results']:
+                if r['type'] in ('error', 'warning'):
+                    print(f"    {r['type'].upper()}: {r['title']} - {r['message']}")
+        print(f"{len(report)} playbook(s) checked, {len(failed)} failed (policy version {snapshot.version}).")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import NamedTuple
+import yaml
+
+# --- Centralized Safety Policy Store ---
+# Safety policies live in one YAML file (or a directory of YAML files) instead of being
+# copied into every playbook and the UI server. The store parses them once into an
+# immutable PolicySnapshot and swaps in a new snapshot when the files change. Callers grab
+# a snapshot once per decision, so a reload never changes the rules under an in-flight check.
+
+DEFAULT_POLICY_PATH = os.environ.get("PSOR_POLICY_PATH", "policies/safety_policies.yml")
+RELOAD_CHECK_SECONDS = 1.0
+
+class Policy(NamedTuple):
+    name: str
+    type: str
+    applies_to: str   # substring of the plugin image name this policy guards
+    parameter: str    # step parameter holding the target
+    targets: frozenset
+    message: str
+
+class Violation(NamedTuple):
+    policy: Policy
+    target: str
+
+class PolicySnapshot(NamedTuple):
+    version: str
+    policies: tuple
+    source: str
+
+    def check(self, plugin, params):
+        """Returns the list of Violations a step would cause under this snapshot."""
+        violations = []
+        for policy in self.policies:
+            if not plugin or policy.applies_to not in plugin:
+                continue
+            target = params.get(policy.parameter)
+            if target is not None and str(target) in policy.targets:
+                violations.append(Violation(policy, str(target)))
+        return violations
+
+class PolicyError(Exception):
+    """Raised when the policy store cannot be parsed."""
+
+def _policy_files(path):
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(('.yml', '.yaml')))
+    return [path]
+
+def _fingerprint(path):
+    files = _policy_files(path)
+    return tuple((f, st.st_mtime_ns, st.st_size, st.st_ino) for f, st in ((f, os.stat(f)) for f in files))
+
+def _parse_policy(p, policy_file):
+    if not isinstance(p, dict):
+        raise PolicyError(f"Invalid policy entry in {policy_file}: each policy must be a mapping.")
+    missing = [k for k in ('name', 'type', 'applies_to', 'parameter') if not isinstance(p.get(k), str) or not p.get(k)]
+    if missing:
+        raise PolicyError(f"Invalid policy entry in {policy_file}: missing or non-string {', '.join(missing)}.")
+    # A scalar here would silently become a set of characters and protect nothing
+    targets = p.get('targets', [])
+    if not isinstance(targets, list) or any(isinstance(t, (dict, list)) or t is None for t in targets):
+        raise PolicyError(f"Policy '{p['name']}' in {policy_file}: 'targets' must be a list of values.")
+    return Policy(name=p['name'], type=p['type'], applies_to=p['applies_to'], parameter=p['parameter'],
+                  targets=frozenset(str(t) for t in targets), message=str(p.get('message') or ''))
+
+def load_snapshot(path):
+    digest = hashlib.sha256()
+    declared_versions = []
+    policies = []
+    policy_files = _policy_files(path)
+    if not policy_files:
+        raise PolicyError(f"No policy files (*.yml, *.yaml) found in {path}.")
+    for policy_file in policy_files:
+        with open(policy_file, 'rb') as f:
+            raw = f.read()
+        digest.update(raw)
+        try:
+            data = yaml.safe_load(raw) or {}
+        except yaml.YAMLError as e:
+            raise PolicyError(f"Failed to parse policy file {policy_file}: {e}")
+        if not isinstance(data, dict):
+            raise PolicyError(f"Policy file {policy_file} must be a YAML mapping.")
+        if 'version' in data:
+            declared_versions.append(str(data['version']))
+        # An empty or truncated file must never load as "no policies": the check would fail open
+        entries = data.get('safety_policies')
+        if not isinstance(entries, list) or not entries:
+            raise PolicyError(f"'safety_policies' in {policy_file} must be a non-empty list of policies.")
+        for p in entries:
+            policies.append(_parse_policy(p, policy_file))
+    # The content hash keeps versions distinct even if someone forgets to bump 'version'
+    version = f"{'.'.join(declared_versions) or '0'}+{digest.hexdigest()[:12]}"
+    return PolicySnapshot(version=version, policies=tuple(policies), source=path)
+
+class PolicyStore:
+    def __init__(self, path=DEFAULT_POLICY_PATH, reload_check=RELOAD_CHECK_SECONDS):
+        self.path = path
+        self.reload_check = reload_check
+        self._lock = threading.Lock()
+        self._fingerprint = _fingerprint(path)
+        self._snapshot = load_snapshot(path)
+        self._next_check = time.monotonic() + reload_check
+        logging.info(f"[POLICY_STORE] Loaded {len(self._snapshot.policies)} safety policies from {path} (version {self._snapshot.version}).")
+
+    def snapshot(self):
+        """Returns the current snapshot, reloading first if the policy files changed on disk."""
+        if time.monotonic() >= self._next_check and self._lock.acquire(blocking=False):
+            # Only one caller checks for changes; everyone else keeps using the current snapshot
+            try:
+                self._reload_if_changed()
+            finally:
+                self._next_check = time.monotonic() + self.reload_check
+                self._lock.release()
+        return self._snapshot
+
+    def _reload_if_changed(self):
+        try:
+            fingerprint = _fingerprint(self.path)
+            if fingerprint == self._fingerprint:
+                return
+            snapshot = load_snapshot(self.path)
+            if self._snapshot.policies and not snapshot.policies:
+                raise PolicyError("refusing to reload to an empty policy set")
+        except (OSError, PolicyError) as e:
+            logging.error(f"[POLICY_STORE] Reload failed, keeping version {self._snapshot.version}: {e}")
+            return
+        self._fingerprint = fingerprint
+        if snapshot.version != self._snapshot.version:
+            logging.info(f"[POLICY_STORE] Safety policies updated: {self._snapshot.version} -> {snapshot.version}")
+            self._snapshot = snapshot
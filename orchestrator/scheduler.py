@@ -0,0 +1,213 @@
+import os
+import time
+import logging
+import threading
+import docker
+
+# --- Multi-host Docker scheduling ---
+# A host is anything exposing the docker-py client surface the orchestrator uses:
+# `ping()`, `images.get(name)`, `containers.list(filters=...)` and `containers.run(...)`.
+# Real hosts wrap a docker.DockerClient; tests can hand in small fake engines with the
+# same methods. Every container the scheduler starts carries SCHEDULER_LABEL, so host load
+# is what the engine reports, shared by every orchestrator process using the same pool.
+
+DEFAULT_CAPACITY = 4
+HEALTH_RETRY_SECONDS = 30.0
+IMAGE_MISS_TTL_SECONDS = 60.0
+LOAD_POLL_SECONDS = 2.0
+SCHEDULER_LABEL = "psor.scheduler"
+
+class NoHealthyHostError(Exception):
+    """Raised when no Docker host in the pool can take more work."""
+
+class DockerHost:
+    def __init__(self, name, client, capacity=DEFAULT_CAPACITY):
+        self.name = name
+        self.client = client
+        self.capacity = max(1, int(capacity))
+        self.active = 0
+        self.healthy = True
+        self.next_probe = 0.0
+        self.known_images = set()
+        self.missing_images = {}  # image -> monotonic time until which the miss is trusted
+        self.running = 0  # scheduler-labelled containers last reported by the engine
+
+    def in_use(self):
+        # The engine count covers other orchestrator processes; `active` also covers slots this
+        # process has claimed whose containers aren't visible to the engine yet
+        return max(self.active, self.running)
+
+    def load(self):
+        return self.in_use() / self.capacity
+
+    def count_running(self):
+        """Asks the engine for its running scheduler-labelled containers; never call it under the lock."""
+        self.running = len(self.client.containers.list(filters={"label": SCHEDULER_LABEL}))
+        return self.running
+
+    def has_image(self, image):
+        """Image affinity lookup; may call the engine, so never call it while holding the scheduler lock.
+
+        Connection/engine errors propagate so the caller can take the host out of service.
+        """
+        if image in self.known_images:
+            return True
+        if self.missing_images.get(image, 0) > time.monotonic():
+            return False
+        try:
+            self.client.images.get(image)
+        except docker.errors.ImageNotFound:
+            self.missing_images[image] = time.monotonic() + IMAGE_MISS_TTL_SECONDS
+            return False
+        self.known_images.add(image)
+        self.missing_images.pop(image, None)
+        return True
+
+    def probe(self):
+        try:
+            self.client.ping()
+            return True
+        except Exception as e:
+            logging.warning(f"[SCHEDULER] Health probe failed for host '{self.name}': {e}")
+            return False
+
+    def __repr__(self):
+        return f"DockerHost({self.name!r}, active={self.active}/{self.capacity}, healthy={self.healthy})"
+
+class HostScheduler:
+    """Least-loaded scheduler with image affinity and failover across Docker hosts."""
+
+    def __init__(self, hosts, health_retry=HEALTH_RETRY_SECONDS, load_poll=LOAD_POLL_SECONDS):
+        if not hosts:
+            raise ValueError("HostScheduler needs at least one Docker host.")
+        self.hosts = list(hosts)
+        self.health_retry = health_retry
+        self.load_poll = load_poll
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        """Build the pool from PSOR_DOCKER_HOSTS, e.g. 'unix:///var/run/docker.sock=4,tcp://10.0.0.7:2375=2'.
+
+        Falls back to the single engine from docker.from_env() when unset. Clients are built with
+        a pinned API version so construction never contacts the engine; hosts that don't answer
+        a ping start out unhealthy and are brought back by the regular re-probe.
+        """
+        version = os.environ.get("PSOR_DOCKER_API_VERSION", docker.constants.DEFAULT_DOCKER_API_VERSION)
+        spec = os.environ.get("PSOR_DOCKER_HOSTS", "").strip()
+        if not spec:
+            capacity = os.environ.get("PSOR_DOCKER_HOST_CAPACITY", DEFAULT_CAPACITY)
+            hosts = [DockerHost("local", docker.from_env(version=version), capacity)]
+        else:
+            hosts = []
+            for entry in filter(None, (e.strip() for e in spec.split(","))):
+                url, _, capacity = entry.partition("=")
+                hosts.append(DockerHost(url, docker.DockerClient(base_url=url, version=version), capacity or DEFAULT_CAPACITY))
+        scheduler = cls(hosts)
+        scheduler.probe_all()
+        return scheduler
+
+    def probe_all(self):
+        for host in self.hosts:
+            if not host.probe():
+                self.mark_unhealthy(host, "not reachable at startup")
+
+    def _reprobe_unhealthy(self, force=False):
+        now = time.monotonic()
+        with self._cond:
+            due = [h for h in self.hosts if not h.healthy and (force or h.next_probe <= now)]
+            for host in due:
+                host.next_probe = now + self.health_retry
+        # Probe outside the lock so a slow engine doesn't stall other steps
+        recovered = [h for h in due if h.probe()]
+        if recovered:
+            with self._cond:
+                for host in recovered:
+                    host.healthy = True
+                    logging.info(f"[SCHEDULER] Host '{host.name}' is healthy again.")
+                self._cond.notify_all()
+
+    def _resolve_affinity(self, image, exclude):
+        """Returns the names of candidate hosts that already have the image (checked outside the lock)."""
+        with_image = set()
+        for host in [h for h in self.hosts if h.healthy and h.name not in exclude]:
+            try:
+                if host.has_image(image):
+                    with_image.add(host.name)
+            except (docker.errors.APIError, OSError) as e:
+                self.mark_unhealthy(host, e)
+        return with_image
+
+    def _refresh_load(self, exclude):
+        """Updates each candidate host's engine-reported load (outside the lock)."""
+        for host in [h for h in self.hosts if h.healthy and h.name not in exclude]:
+            try:
+                host.count_running()
+            except (docker.errors.APIError, OSError) as e:
+                self.mark_unhealthy(host, e)
+
+    def _pick(self, image, with_image, exclude):
+        candidates = [h for h in self.hosts if h.healthy and h.name not in exclude]
+        if not candidates:
+            raise NoHealthyHostError(f"No healthy Docker host available for '{image}' (tried: {sorted(exclude) or 'none'}).")
+        free = [h for h in candidates if h.in_use() < h.capacity]
+        if not free:
+            return None
+        # Prefer hosts that already have the image, then the least loaded one
+        return min(free, key=lambda h: (h.name not in with_image, h.load(), h.name))
+
+    def acquire(self, image, exclude=()):
+        while True:
+            # With the whole pool down, don't wait out the retry interval: check every host right away
+            self._reprobe_unhealthy(force=not any(h.healthy for h in self.hosts))
+            with_image = self._resolve_affinity(image, exclude)
+            self._refresh_load(exclude)
+            with self._cond:
+                host = self._pick(image, with_image, exclude)
+                if host:
+                    host.active += 1
+                    return host
+                # Full everywhere: wake on a local release, or re-read engine load after load_poll
+                self._cond.wait(timeout=self.load_poll)
+
+    def release(self, host):
+        with self._cond:
+            host.active -= 1
+            self._cond.notify()
+
+    def mark_unhealthy(self, host, reason):
+        with self._cond:
+            host.healthy = False
+            host.next_probe = time.monotonic() + self.health_retry
+            self._cond.notify_all()
+        logging.warning(f"[SCHEDULER] Host '{host.name}' marked unhealthy: {reason}")
+
+    def run(self, image, command, **kwargs):
+        """Run a plugin container to completion on the best available host.
+
+        Plugin failures (ContainerError, ImageNotFound, and engine errors while the host still
+        answers ping) are raised to the caller as before; if the host stops answering, it is
+        marked unhealthy and the step is retried elsewhere.
+        """
+        kwargs.setdefault("network_mode", "host")
+        kwargs["labels"] = {**(kwargs.get("labels") or {}), SCHEDULER_LABEL: "true"}
+        tried = set()
+        while True:
+            host = self.acquire(image, tried)
+            logging.info(f"[SCHEDULER] Scheduling '{image}' on host '{host.name}' ({host.active}/{host.capacity} slots in use).")
+            try:
+                output = host.client.containers.run(image=image, command=command, detach=False, remove=True, **kwargs)
+                host.known_images.add(image)
+                return output
+            except (docker.errors.ContainerError, docker.errors.ImageNotFound):
+                raise
+            except (docker.errors.APIError, OSError) as e:
+                if isinstance(e, docker.errors.APIError) and e.is_client_error():
+                    raise
+                # e.g. "OCI runtime create failed" is a 500 from a perfectly healthy engine
+                if host.probe():
+                    raise
+                tried.add(host.name)
+                self.mark_unhealthy(host, e)
+            finally:
+                self.release(host)
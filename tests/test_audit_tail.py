@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from audit_tail import AuditLogTailer
+
+LINE_A = "2025-10-17 11:25:48,767 [INFO ]  Starting playbook execution...\n"
+LINE_B = "2025-10-17 11:25:48,768 [INFO ]  [SAFETY_CHECK_PASSED] Action is approved.\n"
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((event, data))
+
+
+def subscribe(tailer, file_id=None, offset=0):
+    events, rooms = [], []
+    tailer.subscribe(lambda event, data: events.append((event, data)), rooms.append, file_id, offset)
+    return events
+
+
+def records(events):
+    return [line for event, data in events if event == 'audit_records' for line in data['records']]
+
+
+def test_file_keeps_its_id_while_first_line_is_written(tmp_path):
+    path = tmp_path / "audit.log"
+    sio = FakeSocketIO()
+    tailer = AuditLogTailer(sio, str(path))
+    with open(path, 'w') as f:
+        f.write(LINE_A[:10])
+        f.flush()
+        tailer._drain()
+        f.write(LINE_A[10:])
+        f.flush()
+        tailer._drain()
+        f.write(LINE_B)
+        f.flush()
+        tailer._drain()
+    assert [e for e, _ in sio.events].count('audit_reset') == 1
+    assert records(sio.events) == [LINE_A.strip(), LINE_B.strip()]
+
+
+def test_resume_sends_only_missed_records(tmp_path):
+    path = tmp_path / "audit.log"
+    path.write_text(LINE_A)
+    tailer = AuditLogTailer(FakeSocketIO(), str(path))
+    synced = subscribe(tailer)[-1][1]
+    with open(path, 'a') as f:
+        f.write(LINE_B)
+    events = subscribe(tailer, synced['file_id'], synced['offset'])
+    assert 'audit_reset' not in [e for e, _ in events]
+    assert records(events) == [LINE_B.strip()]
+
+
+def test_recreated_log_resets_subscribers(tmp_path):
+    path = tmp_path / "audit.log"
+    path.write_text(LINE_A)
+    sio = FakeSocketIO()
+    tailer = AuditLogTailer(sio, str(path))
+    synced = subscribe(tailer)[-1][1]
+    os.remove(path)
+    path.write_text(LINE_B)
+    events = subscribe(tailer, synced['file_id'], synced['offset'])
+    assert events[0][0] == 'audit_reset' and events[0][1]['file_id'] != synced['file_id']
+    assert records(events) == [LINE_B.strip()]
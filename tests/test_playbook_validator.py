@@ -0,0 +1,86 @@
+import os
+import sys
+import concurrent.futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestrator"))
+import playbook_validator
+from playbook_validator import PARALLEL_THRESHOLD, has_errors, main, validate_many
+from policy_store import load_snapshot
+
+POLICY = """
+version: {version}
+safety_policies:
+  - name: corporate_ip_check
+    type: do_not_block
+    applies_to: block-ip
+    parameter: ip_address
+    targets: ["8.8.8.8"]
+"""
+
+PLAYBOOK = """
+name: Block {ip}
+steps:
+  - name: Block the address
+    plugin: psor_platform_plugin-java-block-ip
+    parameters:
+      ip_address: "{ip}"
+"""
+
+
+def write_policy(tmp_path, version=1):
+    path = tmp_path / "safety_policies.yml"
+    path.write_text(POLICY.format(version=version))
+    return str(path)
+
+
+def write_playbooks(tmp_path, count, ip="198.51.100.23"):
+    directory = tmp_path / "playbooks"
+    directory.mkdir(exist_ok=True)
+    for i in range(count):
+        (directory / f"playbook_{i:02}.yml").write_text(PLAYBOOK.format(ip=ip) + f"# {i}\n")
+    return str(directory)
+
+
+def test_unchanged_playbook_is_served_from_cache(tmp_path):
+    snapshot = load_snapshot(write_policy(tmp_path))
+    playbooks, cache = write_playbooks(tmp_path, 1), str(tmp_path / "cache.json")
+    first = validate_many([playbooks], snapshot, cache_path=cache, jobs=1)
+    second = validate_many([playbooks], snapshot, cache_path=cache, jobs=1)
+    assert [e['cached'] for e in first.values()] == [False]
+    assert [e['cached'] for e in second.values()] == [True]
+    assert list(second.values())[0]['results'] == list(first.values())[0]['results']
+
+
+def test_policy_version_change_misses_cache(tmp_path):
+    playbooks, cache = write_playbooks(tmp_path, 1), str(tmp_path / "cache.json")
+    validate_many([playbooks], load_snapshot(write_policy(tmp_path, version=1)), cache_path=cache, jobs=1)
+    report = validate_many([playbooks], load_snapshot(write_policy(tmp_path, version=2)), cache_path=cache, jobs=1)
+    assert [e['cached'] for e in report.values()] == [False]
+
+
+def test_many_misses_are_validated_in_a_process_pool(tmp_path, monkeypatch):
+    pools = []
+
+    class RecordingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr(playbook_validator, "ProcessPoolExecutor", RecordingPool)
+    snapshot = load_snapshot(write_policy(tmp_path))
+    playbooks = write_playbooks(tmp_path, PARALLEL_THRESHOLD, ip="8.8.8.8")
+    report = validate_many([playbooks], snapshot, cache_path=None, jobs=None)
+    assert len(pools) == 1
+    assert len(report) == PARALLEL_THRESHOLD
+    assert all(has_errors(e['results']) and not e['cached'] for e in report.values())
+
+
+def test_main_exits_nonzero_on_policy_violation(tmp_path, capsys):
+    policies = write_policy(tmp_path)
+    cache = str(tmp_path / "cache.json")
+    good = write_playbooks(tmp_path, 1)
+    assert main([good, "--policies", policies, "--cache", cache]) == 0
+    bad = tmp_path / "bad.yml"
+    bad.write_text(PLAYBOOK.format(ip="8.8.8.8"))
+    assert main([str(bad), "--policies", policies, "--cache", cache]) == 1
+    assert "[FAIL]" in capsys.readouterr().out
@@ -0,0 +1,70 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestrator"))
+from policy_store import PolicyStore, PolicyError, load_snapshot
+
+POLICY = """
+version: 1
+safety_policies:
+  - name: corporate_ip_check
+    type: do_not_block
+    applies_to: block-ip
+    parameter: ip_address
+    targets: ["8.8.8.8"]
+"""
+
+
+def write(tmp_path, text):
+    path = tmp_path / "safety_policies.yml"
+    path.write_text(text)
+    return str(path)
+
+
+def test_check_reports_violations():
+    snapshot = load_snapshot(os.path.join(os.path.dirname(__file__), "..", "policies", "safety_policies.yml"))
+    violations = snapshot.check("psor_platform_plugin-java-block-ip", {"ip_address": "8.8.8.8"})
+    assert [v.policy.name for v in violations] == ["corporate_ip_check"]
+    assert snapshot.check("psor_platform_plugin-java-block-ip", {"ip_address": "198.51.100.23"}) == []
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "version: 2\n",
+    "safety_policies: []\n",
+    "safety_policies:\n",
+    "safety_policies: corporate_ip_check\n",
+    "safety_policies:\n  - just-a-string\n",
+    POLICY.replace('targets: ["8.8.8.8"]', "targets: 8.8.8.8"),
+    POLICY.replace("    type: do_not_block\n", ""),
+])
+def test_malformed_policies_are_rejected(tmp_path, text):
+    with pytest.raises(PolicyError):
+        load_snapshot(write(tmp_path, text))
+
+
+def test_empty_policy_directory_is_rejected(tmp_path):
+    with pytest.raises(PolicyError):
+        load_snapshot(str(tmp_path))
+
+
+@pytest.mark.parametrize("broken", ["safety_policies:\n", "", "version: 2\n"])
+def test_broken_edit_keeps_previous_snapshot(tmp_path, broken):
+    path = write(tmp_path, POLICY)
+    store = PolicyStore(path, reload_check=0)
+    before = store.snapshot()
+    write(tmp_path, broken)  # "" is a truncated file, as left by a non-atomic editor save
+    assert store.snapshot() is before
+    assert store.snapshot().check("block-ip", {"ip_address": "8.8.8.8"})
+
+
+def test_edit_swaps_in_new_version(tmp_path):
+    path = write(tmp_path, POLICY)
+    store = PolicyStore(path, reload_check=0)
+    before = store.snapshot()
+    write(tmp_path, POLICY.replace("version: 1", "version: 2").replace('"8.8.8.8"', '"1.1.1.1"'))
+    after = store.snapshot()
+    assert after.version.startswith("2+") and after.version != before.version
+    assert before.check("block-ip", {"ip_address": "8.8.8.8"})
+    assert after.check("block-ip", {"ip_address": "1.1.1.1"})
@@ -0,0 +1,241 @@
+import os
+import sys
+import time
+import threading
+import pytest
+import requests
+
+docker = pytest.importorskip("docker")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestrator"))
+import scheduler as scheduler_module
+from scheduler import DockerHost, HostScheduler, NoHealthyHostError, SCHEDULER_LABEL
+
+
+def server_error(message="OCI runtime create failed"):
+    response = requests.Response()
+    response.status_code = 500
+    response.reason = "Internal Server Error"
+    response.url = "http://fake-engine/containers/create"
+    return docker.errors.APIError(message, response=response)
+
+
+class FakeImages:
+    def __init__(self, engine):
+        self.engine = engine
+        self.calls = 0
+
+    def get(self, name):
+        self.calls += 1
+        if self.engine.images_error:
+            raise self.engine.images_error
+        if name not in self.engine.image_names:
+            raise docker.errors.ImageNotFound(name)
+        return name
+
+
+class FakeContainers:
+    def __init__(self, engine):
+        self.engine = engine
+        self.runs = []
+        self.running = []  # labels of containers currently running
+        self.hold = None  # threading.Event that keeps run() "running" until set
+
+    def run(self, image, command, labels=None, **kwargs):
+        self.runs.append((image, command, labels))
+        if self.engine.run_error:
+            raise self.engine.run_error
+        labels = labels or {}
+        self.running.append(labels)
+        try:
+            if self.hold:
+                self.hold.wait(5)
+        finally:
+            self.running.remove(labels)
+        return f"ran {image} on {self.engine.name}".encode()
+
+    def list(self, filters=None):
+        if not self.engine.alive:
+            raise requests.exceptions.ConnectionError(f"{self.engine.name} is down")
+        label = (filters or {}).get("label")
+        return [c for c in self.running if label is None or label in c]
+
+
+class FakeEngine:
+    def __init__(self, name, image_names=(), alive=True):
+        self.name = name
+        self.image_names = set(image_names)
+        self.alive = alive
+        self.images_error = None
+        self.run_error = None
+        self.images = FakeImages(self)
+        self.containers = FakeContainers(self)
+
+    def ping(self):
+        if not self.alive:
+            raise requests.exceptions.ConnectionError(f"{self.name} is down")
+        return True
+
+
+def make_pool(*engines, capacity=4, health_retry=30.0, load_poll=0.05):
+    hosts = [DockerHost(e.name, e, capacity) for e in engines]
+    return HostScheduler(hosts, health_retry=health_retry, load_poll=load_poll), hosts
+
+
+def run_in_background(scheduler, image="plugin"):
+    thread = threading.Thread(target=scheduler.run, args=(image, []), daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_picks_least_loaded_host():
+    scheduler, (a, b) = make_pool(FakeEngine("a"), FakeEngine("b"))
+    a.active = 2
+    assert scheduler.acquire("plugin") is b
+
+
+def test_prefers_host_that_has_the_image():
+    scheduler, (a, b) = make_pool(FakeEngine("a"), FakeEngine("b", image_names={"plugin"}))
+    b.active = 3
+    assert scheduler.acquire("plugin") is b
+
+
+def test_image_misses_are_cached():
+    engine = FakeEngine("a")
+    scheduler, _ = make_pool(engine)
+    scheduler.run("plugin", [])
+    scheduler.run("other", [])
+    scheduler.run("other", [])
+    # 'plugin' became known after its run; 'other' was looked up once, then served from cache
+    assert engine.images.calls == 2
+
+
+def test_acquire_blocks_at_capacity_until_release():
+    scheduler, (a,) = make_pool(FakeEngine("a"), capacity=1)
+    first = scheduler.acquire("plugin")
+    acquired = threading.Event()
+    threading.Thread(target=lambda: (scheduler.acquire("plugin"), acquired.set()), daemon=True).start()
+    assert not acquired.wait(0.2)
+    scheduler.release(first)
+    assert acquired.wait(2)
+
+
+def test_fails_over_when_host_stops_answering():
+    down, up = FakeEngine("a"), FakeEngine("b")
+    scheduler, (a, b) = make_pool(down, up)
+    down.run_error = requests.exceptions.ConnectionError("connection refused")
+    down.alive = False
+    assert scheduler.run("plugin", []) == b"ran plugin on b"
+    assert not a.healthy and b.healthy
+    assert a.active == 0 and b.active == 0
+
+
+def test_unhealthy_host_is_reprobed():
+    engine = FakeEngine("a")
+    scheduler, (a, b) = make_pool(engine, FakeEngine("b"), health_retry=0.05)
+    scheduler.mark_unhealthy(a, "test")
+    time.sleep(0.1)
+    scheduler.acquire("plugin")
+    assert a.healthy
+
+
+def test_plugin_server_error_on_healthy_engine_is_raised_not_failed_over():
+    engine = FakeEngine("local")
+    scheduler, (host,) = make_pool(engine)
+    engine.run_error = server_error()
+    with pytest.raises(docker.errors.APIError):
+        scheduler.run("plugin", [])
+    assert host.healthy
+    engine.run_error = None
+    assert scheduler.run("plugin", []) == b"ran plugin on local"
+
+
+def test_last_host_is_reprobed_immediately_when_whole_pool_is_down():
+    engine = FakeEngine("local")
+    scheduler, (host,) = make_pool(engine, health_retry=3600)
+    scheduler.mark_unhealthy(host, "blip")
+    assert scheduler.run("plugin", []) == b"ran plugin on local"
+    engine.alive = False
+    scheduler.mark_unhealthy(host, "down")
+    with pytest.raises(NoHealthyHostError):
+        scheduler.run("plugin", [])
+
+
+def test_image_lookup_connection_error_marks_host_unhealthy():
+    broken = FakeEngine("a", image_names={"plugin"})
+    broken.images_error = requests.exceptions.ConnectionError("connection reset")
+    scheduler, (a, b) = make_pool(broken, FakeEngine("b"))
+    assert scheduler.acquire("plugin") is b
+    assert not a.healthy
+
+
+def test_slow_image_lookup_does_not_hold_the_lock():
+    slow = FakeEngine("a")
+    original_get = slow.images.get
+    slow.images.get = lambda name: (time.sleep(0.5), original_get(name))[1]
+    scheduler, (a,) = make_pool(slow)
+    threading.Thread(target=lambda: scheduler.acquire("plugin"), daemon=True).start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    with scheduler._cond:
+        pass
+    assert time.monotonic() - started < 0.2
+
+
+def test_run_labels_containers():
+    engine = FakeEngine("a")
+    scheduler, _ = make_pool(engine)
+    scheduler.run("plugin", [], labels={"team": "soc"})
+    assert engine.containers.runs[0][2] == {"team": "soc", SCHEDULER_LABEL: "true"}
+
+
+def test_load_is_shared_between_schedulers_via_the_engine():
+    a, b = FakeEngine("a"), FakeEngine("b")
+    first, _ = make_pool(a, b, capacity=1)
+    second, (second_a, second_b) = make_pool(a, b, capacity=1)
+    a.containers.hold = b.containers.hold = threading.Event()
+    try:
+        run_in_background(first)
+        wait_for(lambda: len(a.containers.running) == 1)
+        # The other process sees 'a' busy through the engine and picks 'b'
+        assert second.acquire("plugin") is second_b
+        second.release(second_b)
+
+        run_in_background(first)
+        wait_for(lambda: len(b.containers.running) == 1)
+        acquired = threading.Event()
+        threading.Thread(target=lambda: (second.acquire("plugin"), acquired.set()), daemon=True).start()
+        assert not acquired.wait(0.2)  # capacity is enforced across processes
+    finally:
+        a.containers.hold.set()
+    assert acquired.wait(2)
+
+
+def test_host_down_at_startup_does_not_abort_and_is_reprobed(monkeypatch):
+    engines = {"tcp://a:2375": FakeEngine("a", alive=False), "tcp://b:2375": FakeEngine("b")}
+    created = []
+
+    def fake_client(base_url, version=None):
+        created.append(version)
+        return engines[base_url]
+
+    monkeypatch.setattr(scheduler_module.docker, "DockerClient", fake_client)
+    monkeypatch.setenv("PSOR_DOCKER_HOSTS", "tcp://a:2375=2,tcp://b:2375=2")
+    scheduler = HostScheduler.from_env()
+    a, b = scheduler.hosts
+    assert all(created)  # a pinned API version, so construction never contacts the engine
+    assert not a.healthy and b.healthy
+    assert scheduler.run("plugin", []) == b"ran plugin on b"
+
+    engines["tcp://a:2375"].alive = True
+    scheduler.health_retry = 0
+    a.next_probe = 0
+    b.active = b.capacity = 1  # keep 'b' busy so the recovered host gets the work
+    assert scheduler.run("plugin", []) == b"ran plugin on a"
+    assert a.healthy
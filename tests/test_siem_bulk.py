@@ -0,0 +1,83 @@
+import os
+import sys
+import gzip
+import json
+import queue
+import time
+import pytest
+
+pytest.importorskip("flask")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "adapters"))
+import siem_listener
+
+MAPPED = {"rule_name": "Malicious C2 Communication Detected", "destination_ip": "123.123.123.123", "hostname": "finance-pc-05"}
+
+
+@pytest.fixture
+def triggered(monkeypatch):
+    calls = []
+    monkeypatch.setattr(siem_listener, "trigger_playbook", lambda path, params: calls.append((path, params)))
+    return calls
+
+
+def post_bulk(lines, compress=True, body=None):
+    if body is None:
+        body = "".join(line + "\n" for line in lines).encode()
+        body = gzip.compress(body) if compress else body
+    headers = {"Content-Type": "application/x-ndjson"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    response = siem_listener.app.test_client().post("/webhook/bulk", data=body, headers=headers)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+
+def test_results_per_alert_and_dispatch(triggered):
+    results = post_bulk([json.dumps(MAPPED), json.dumps({"rule_name": "Unmapped"}), "", "not json", "[1]"])
+    assert [r.get("status") for r in results[:-1]] == ["accepted", "ignored", "rejected", "rejected"]
+    assert [r["line"] for r in results[:-1]] == [1, 2, 4, 5]
+    assert results[0]["parameters"] == {"ip_address": "123.123.123.123", "endpoint_id": "finance-pc-05"}
+    assert results[-1] == {"summary": {"accepted": 1, "ignored": 1, "rejected": 2}}
+    siem_listener.dispatch_queue.join()
+    assert triggered == [("playbooks/remediate_compromised_host.yml", results[0]["parameters"])]
+
+
+def test_uncompressed_body_is_accepted(triggered):
+    results = post_bulk([json.dumps({"rule_name": "Unmapped"})], compress=False)
+    assert results[0]["status"] == "ignored"
+
+
+def test_oversized_line_is_rejected_and_parsing_continues(monkeypatch, triggered):
+    monkeypatch.setattr(siem_listener, "MAX_ALERT_BYTES", 64)
+    results = post_bulk([json.dumps({"rule_name": "x" * 200}), json.dumps({"rule_name": "Unmapped"})])
+    assert results[0]["status"] == "rejected" and "exceeds" in results[0]["message"]
+    assert results[1] == {"line": 2, "status": "ignored", "message": "No playbook mapping found"}
+
+
+def test_non_gzip_body_reports_malformed_body(triggered):
+    results = post_bulk([], body=b"plain text, not gzip")
+    assert results[0]["status"] == "error"
+    assert results[-1] == {"summary": {"accepted": 0, "ignored": 0, "rejected": 0}}
+
+
+def test_truncated_gzip_keeps_decoded_alerts(triggered):
+    body = gzip.compress("".join(json.dumps({"rule_name": "Unmapped"}) + "\n" for _ in range(3)).encode())
+    results = post_bulk([], body=body[:-12])
+    # Lines decoded before the truncation keep their results; then one error and the summary
+    assert results[-2]["status"] == "error" and "summary" in results[-1]
+    assert results[:-2] and all(r["status"] == "ignored" for r in results[:-2])
+    assert results[-1]["summary"]["ignored"] == len(results) - 2
+
+
+def test_full_queue_rejects_rest_of_batch_without_waiting(monkeypatch, triggered):
+    full = queue.Queue(maxsize=1)
+    full.put_nowait(("busy", {}))
+    monkeypatch.setattr(siem_listener, "dispatch_queue", full)
+    monkeypatch.setattr(siem_listener, "ensure_dispatch_workers", lambda: None)
+    monkeypatch.setattr(siem_listener, "DISPATCH_TIMEOUT_SECONDS", 0.3)
+    started = time.monotonic()
+    results = post_bulk([json.dumps(MAPPED)] * 4)
+    elapsed = time.monotonic() - started
+    assert [r.get("status") for r in results[:-1]] == ["rejected"] * 4
+    assert all("queue full" in r["message"] for r in results[:-1])
+    assert elapsed < 0.3 * 2  # one timeout for the batch, not one per alert